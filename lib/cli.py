@@ -7,13 +7,11 @@ command-line interface
 
 import argparse
 import collections
-import io
 import json
 import re
 import shutil
 import subprocess
 import sys
-import types
 import urllib.parse
 import urllib.request
 
@@ -36,12 +34,13 @@ def get_json(url, headers=()):
         {'Content-Type': 'application/vnd.travis-ci.2+json'}
     )
     with get(url, headers) as fp:
-        with io.TextIOWrapper(fp, encoding='UTF-8') as tfp:
-            return json.load(tfp)
+        return json.loads(fp.read())
 
 _dispatch = []
 
 def dispatch(regex):
+    regex = ('/' if regex else '') + regex
+    regex = re.compile(fr'\A/(?:github/)?(?P<project>[\w.-]+/[\w.-]+){regex}\Z')
     def decorator(cmd):
         _dispatch.append((regex, cmd))
         return cmd
@@ -79,9 +78,7 @@ def main():
     if netloc != 'travis-ci.org':
         ap.error('unsupported URL')
     for regex, cmd in _dispatch:
-        regex = ('/' if regex else '') + regex
-        regex = fr'\A/(?:github/)?(?P<project>[\w.-]+/[\w.-]+){regex}\Z'
-        match = re.match(regex, path)
+        match = regex.match(path)
         if match is not None:
             break
     else:
@@ -89,6 +86,12 @@ def main():
     with lib.pager.autopager():
         return cmd(options, **match.groupdict())
 
+_branch_template = '#{number} {branch} {state}'
+_branch_template_running = '{t.yellow}' + _branch_template
+_branch_template_failed = '{t.bold}{t.red}' + _branch_template
+_url_template = '{t.cyan}{url}{t.off}'
+_url_template_failed = '{t.cyan}{t.bold}{url}{t.off}'
+
 @dispatch('')
 @dispatch('branches')
 def show_branches(options, project):
@@ -97,13 +100,13 @@ def show_branches(options, project):
     commits = {c['id']: c for c in data['commits']}
     for branch in data['branches']:
         commit = commits[branch['commit_id']]
-        template = '#{number} {branch} {state}'
-        curious = False
+        template = _branch_template
+        url_template = _url_template
         if branch['finished_at'] is None:
-            template = '{t.yellow}' + template
+            template = _branch_template_running
         elif branch['state'] != 'passed':
-            template = '{t.bold}{t.red}' + template
-            curious = True
+            template = _branch_template_failed
+            url_template = _url_template_failed
         lib.colors.print(template,
             number=branch['number'],
             branch=commit['branch'],
@@ -111,13 +114,13 @@ def show_branches(options, project):
         )
         branch_id = branch['id']
         url = f'https://travis-ci.org/{project}/builds/{branch_id}'
-        template = '{t.cyan}'
-        if curious:
-            template += '{t.bold}'
-        template += '{url}{t.off}'
-        lib.colors.print(template, url=url, space='')
+        print(lib.colors.format_raw(url_template, url=url))
         print()
 
+_job_template = '#{number} {config}{t.off}'
+_job_template_running = '{t.yellow}' + _job_template
+_job_template_failed = '{t.bold}{t.red}' + _job_template
+
 @dispatch(r'builds/(?P<build_id>\d+)')
 def show_build(options, project, build_id):
     url = f'https://api.travis-ci.org/repos/{project}/builds/{build_id}'
@@ -125,57 +128,70 @@ def show_build(options, project, build_id):
     config_coll = collections.defaultdict(set)
     matrix = data['matrix']
     config_keys = collections.Counter()
+    clean_configs = []
     for job in matrix:
-        config_keys.update(job['config'].keys())
-    def config_sort(item):
-        (key, value) = item
-        return (-config_keys[key], key)
-    for job in matrix:
-        for key in config_keys:
-            value = job['config'].get(key)
-            if isinstance(value, (dict, list)):
-                continue
+        config = job['config']
+        config_keys.update(config.keys())
+        config = {
+            key: value
+            for key, value in config.items()
+            if not isinstance(value, (dict, list))
+            if not key.startswith('.')
+        }
+        for key, value in config.items():
             config_coll[key].add(value)
-    for job in matrix:
-        template = '#{number} {config}'
-        error = False
+        clean_configs += [config]
+    for key, n in config_keys.items():
+        if n < len(matrix):
+            # missing in some jobs
+            config_coll[key].add(None)
+    config_rank = {
+        key: (-n, key)
+        for key, n in config_keys.items()
+    }
+    for job, job_config in zip(matrix, clean_configs):
+        template = _job_template
+        url_template = _url_template
         if job['finished_at'] is None:
-            template = '{t.yellow}' + template
+            template = _job_template_running
         elif job['result'] != 0:
-            error = True
-            template = '{t.bold}{t.red}' + template
-        template += '{t.off}'
+            template = _job_template_failed
+            url_template = _url_template_failed
         config = []
-        for key, value in sorted(job['config'].items(), key=config_sort):
-            if key.startswith('.'):
-                continue
-            if isinstance(value, (dict, list)):
-                continue
+        for key in sorted(job_config, key=config_rank.__getitem__):
             if len(config_coll[key]) == 1:
                 continue
+            value = job_config[key]
             config += [f'{key}={value}']
         config = ' '.join(config)
         lib.colors.print(template, number=job['number'], config=config)
         job_id = job['id']
         url = f'https://travis-ci.org/{project}/jobs/{job_id}'
-        template = '{t.cyan}'
-        if error:
-            template += '{t.bold}'
-        template += '{url}{t.off}'
-        lib.colors.print(template, url=url, space='')
+        print(lib.colors.format_raw(url_template, url=url))
         print()
 
-def print_ts_lines(fp):
-    template = '{t.dim}{m:02}:{s:05.2f}{t.off}'
-    placeholder = ' ' * len(template.format(m=0, s=0, t=types.SimpleNamespace(dim='', off='')))
+_ansi_esc_re = re.compile(br'\x1B\[.*?[a-zA-Z]')
+_travis_time_re = re.compile(br'\Atravis_time:end:\w+:start=(\d+),finish=(\d+),duration=\d+\Z')
+
+_ts_format = '{m:02}:{s:05.2f}'
+_ts_template = '{t.dim}' + _ts_format + '{t.off}'
+_ts_placeholder = b' ' * len(_ts_format.format(m=0, s=0))
+
+def print_ts_lines(fp, batch=64):
+    out = sys.stdout.buffer
     start = None
-    for line in fp:
+    parts = []
+    for n, line in enumerate(fp, start=1):
         line = line.rstrip(b'\r\n')
-        *pragmas, text = line.split(b'\r')
+        if b'\r' in line:
+            *pragmas, text = line.split(b'\r')
+        else:
+            # fast path: no pragmas
+            (pragmas, text) = ((), line)
         have_ts = False
         for pragma in pragmas:
-            pragma = re.sub(br'\x1B\[.*?[a-zA-Z]', b'', pragma)
-            match = re.match(br'\Atravis_time:end:\w+:start=(\d+),finish=(\d+),duration=\d+\Z', pragma)
+            pragma = _ansi_esc_re.sub(b'', pragma)
+            match = _travis_time_re.match(pragma)
             if match is None:
                 continue
             if start is None:
@@ -184,17 +200,45 @@ def print_ts_lines(fp):
             t = end - start
             m, s = divmod(t, 60)
             if have_ts:
-                print()
-            ts = lib.colors.format(template, m=int(m), s=s)
-            print(ts, end='')
+                parts += [b'\n']
+            ts = lib.colors.format(_ts_template, m=int(m), s=s)
+            parts += [ts.encode('ASCII')]
             have_ts = True
-        if have_ts:
-            print('', end=' ')
-        else:
-            print(placeholder, end=' ')
-        sys.stdout.flush()
-        sys.stdout.buffer.write(text)
-        sys.stdout.buffer.write(b'\n')
+        if not have_ts:
+            parts += [_ts_placeholder]
+        parts += [b' ', text, b'\n']
+        if n % batch == 0:
+            out.write(b''.join(parts))
+            parts = []
+    out.write(b''.join(parts))
+
+def _last_cr_segment(line):
+    line = line.rstrip(b'\r\n')
+    i = line.rfind(b'\r')
+    return line[i + 1:]
+
+def print_lines(fp, bufsize=65536):
+    out = sys.stdout.buffer
+    tail = []
+    while True:
+        chunk = fp.read(bufsize)
+        if not chunk:
+            break
+        lines = chunk.split(b'\n')
+        if len(lines) == 1:
+            # no line terminator in this chunk
+            tail += lines
+            continue
+        tail += [lines[0]]
+        lines[0] = b''.join(tail)
+        tail = [lines.pop()]
+        lines = list(map(_last_cr_segment, lines))
+        lines += [b'']
+        out.write(b'\n'.join(lines))
+    buf = b''.join(tail)
+    if buf:
+        buf = _last_cr_segment(buf)
+        out.write(buf + b'\n')
 
 @dispatch(r'jobs/(?P<job_id>\d+)')
 def show_job(options, project, job_id):
@@ -205,10 +249,7 @@ def show_job(options, project, job_id):
         elif options.timestamps:
             print_ts_lines(fp)
         else:
-            for line in fp:
-                line = line.rstrip(b'\r\n').rsplit(b'\r', 1)[-1]
-                sys.stdout.buffer.write(line)
-                sys.stdout.buffer.write(b'\n')
+            print_lines(fp)
 
 __all__ = ['main']
 
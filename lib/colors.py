@@ -20,20 +20,27 @@ class _seq:
     unreverse = '\x1B[27m'
 
 def _quote_unsafe_char(ch):
-    t = _seq
     if ch < ' ' or ch == '\x7F':
-        s = '^' + chr(ord('@') ^ ord(ch))
+        return '^' + chr(ord('@') ^ ord(ch))
     else:
-        s = f'<U+{ord(ch):04X}>'
-    return f'{t.reverse}{s}{t.unreverse}'
+        return f'<U+{ord(ch):04X}>'
+
+_unsafe_char_escapes = {
+    i: _quote_unsafe_char(chr(i))
+    for i in [*range(0x00, 0x20), *range(0x7F, 0xA0)]
+}
 
 def _quote_unsafe(s):
-    return ''.join(map(_quote_unsafe_char, s))
+    t = _seq
+    s = s.translate(_unsafe_char_escapes)
+    return f'{t.reverse}{s}{t.unreverse}'
+
+_unsafe_re = re.compile(r'([\x00-\x1F\x7F-\x9F]+)')
 
 def _quote(s):
-    if not isinstance(s, str):
+    if _unsafe_re.search(s) is None:
         return s
-    chunks = re.split(r'([\x00-\x1F\x7F-\x9F]+)', s)
+    chunks = _unsafe_re.split(s)
     def esc():
         for i, s in enumerate(chunks):
             if i & 1:
@@ -45,15 +52,22 @@ def _quote(s):
 def format(_s, **kwargs):
     kwargs.update(t=_seq)
     return _s.format_map({
-        key: _quote(value)
+        key: _quote(value) if isinstance(value, str) else value
         for key, value in kwargs.items()
     })
 
+def format_raw(_s, **kwargs):
+    # Like format(), but without quoting;
+    # only for values that are known not to contain control characters.
+    kwargs.update(t=_seq)
+    return _s.format_map(kwargs)
+
 def print(_s='', **kwargs):
     builtins.print(format(_s, **kwargs))
 
 __all__ = [
     'format',
+    'format_raw',
     'print',
 ]
 
@@ -6,6 +6,7 @@ automatic pager
 '''
 
 import contextlib
+import functools
 import io
 import os
 import shutil
@@ -16,6 +17,7 @@ def _find_command(command):
     if shutil.which(command):
         return command
 
+@functools.lru_cache(maxsize=1)
 def get_default_pager():
     # Use "pager" if it exist:
     # https://www.debian.org/doc/debian-policy/ch-customized-programs.html#editors-and-pagers
@@ -25,6 +27,16 @@ def get_default_pager():
         or 'more'
     )
 
+@functools.lru_cache(maxsize=1)
+def _get_pager_env():
+    env = {}
+    if 'LESS' not in os.environ:
+        env['LESS'] = 'FXR'
+    if 'LV' not in os.environ:
+        env['LV'] = '-c'
+    if env:
+        return {**os.environ, **env}
+
 @contextlib.contextmanager
 def autopager():
     if not sys.stdout.isatty():
@@ -34,11 +46,7 @@ def autopager():
     if cmdline == 'cat':
         yield
         return
-    env = None
-    if 'LESS' not in os.environ:
-        env = dict(env or os.environ, LESS='FXR')
-    if 'LV' not in os.environ:
-        env = dict(env or os.environ, LV='-c')
+    env = _get_pager_env()
     orig_stdout = sys.stdout
     try:
         pager = ipc.Popen(cmdline, shell=True, stdin=ipc.PIPE, env=env)